@@ -0,0 +1,120 @@
+# bench_pdf_extraction.py - Compare PDF extraction engines on a synthetic corpus
+#
+# Usage (from backend/):
+#   python bench_pdf_extraction.py [--documents 20] [--pages 8]
+#
+# Each engine runs in its own subprocess so peak RSS includes native allocations.
+import argparse
+import difflib
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+from fpdf import FPDF
+
+from pdf_extraction import ENGINES, PdfplumberDocument, extract_page_texts
+
+# "auto" is the production path: fast engine with quality-checked fallback
+BENCH_ENGINES = [PdfplumberDocument.name] + [name for name in ENGINES if name != PdfplumberDocument.name] + ["auto"]
+
+QUESTION = "Question {n} : Quelle part de votre chiffre d'affaires provient de vos trois principaux clients ?"
+ANSWER = ("Réponse : Environ {pct} % du chiffre d'affaires, avec des contrats pluriannuels "
+          "renouvelés chaque année et une relation de proximité avec les équipes achats.")
+
+
+def build_corpus(directory, documents, pages):
+    """Write questionnaire-style PDFs similar to the ones clients upload"""
+    paths = []
+    for d in range(documents):
+        pdf = FPDF()
+        pdf.set_auto_page_break(auto=True, margin=15)
+        n = 0
+        for _ in range(pages):
+            pdf.add_page()
+            pdf.set_font('Arial', 'B', 14)
+            pdf.cell(0, 10, f"Questionnaire diagnostic - Entreprise {d}", ln=True)
+            pdf.set_font('Arial', '', 11)
+            for _ in range(8):
+                n += 1
+                pdf.multi_cell(0, 6, QUESTION.format(n=n) + "\n" + ANSWER.format(pct=(n * 7) % 100))
+                pdf.ln(2)
+        path = os.path.join(directory, f"questionnaire_{d}.pdf")
+        pdf.output(path)
+        paths.append(path)
+    return paths
+
+
+def run_worker(engine, paths):
+    """Extract every document with one engine and report speed and memory"""
+    texts = []
+    pages = 0
+    fallbacks = 0
+    start = time.perf_counter()
+    for path in paths:
+        if engine == "auto":
+            page_texts, fell_back = extract_page_texts(path)
+        else:
+            page_texts, fell_back = extract_page_texts(path, engine, fallback=False)
+        pages += len(page_texts)
+        fallbacks += fell_back
+        texts.append("\n".join(page_texts))
+    elapsed = time.perf_counter() - start
+
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform != "darwin":
+        max_rss *= 1024
+    return {
+        "engine": engine,
+        "pages": pages,
+        "seconds": elapsed,
+        "fallback_pages": fallbacks,
+        "peak_rss_mb": max_rss / (1024 * 1024),
+        "texts": texts,
+    }
+
+
+def similarity(reference, candidate):
+    """Word-level similarity to the pdfplumber output, 1.0 being identical"""
+    return difflib.SequenceMatcher(None, reference.split(), candidate.split(), autojunk=False).ratio()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark PDF text-extraction engines")
+    parser.add_argument("--documents", type=int, default=20)
+    parser.add_argument("--pages", type=int, default=8)
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    parser.add_argument("--corpus", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        paths = sorted(os.path.join(args.corpus, name) for name in os.listdir(args.corpus))
+        print(json.dumps(run_worker(args.worker, paths)))
+        return
+
+    with tempfile.TemporaryDirectory() as corpus:
+        build_corpus(corpus, args.documents, args.pages)
+        results = []
+        for engine in BENCH_ENGINES:
+            output = subprocess.run(
+                [sys.executable, __file__, "--worker", engine, "--corpus", corpus],
+                check=True, capture_output=True, text=True,
+            ).stdout
+            results.append(json.loads(output))
+
+    reference = results[0]
+    print(f"{'engine':<12}{'pages/sec':>12}{'speedup':>10}{'peak MB':>10}{'fallbacks':>11}{'similarity':>12}")
+    for result in results:
+        pages_per_sec = result["pages"] / result["seconds"]
+        speedup = reference["seconds"] / result["seconds"]
+        score = min(similarity(ref, text) for ref, text in zip(reference["texts"], result["texts"]))
+        print(f"{result['engine']:<12}{pages_per_sec:>12.1f}{speedup:>9.1f}x{result['peak_rss_mb']:>10.1f}"
+              f"{result['fallback_pages']:>11}{score:>12.3f}")
+
+
+if __name__ == "__main__":
+    main()
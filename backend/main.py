@@ -1,19 +1,30 @@
 # main.py - Updated to support multiple PDFs
-from fastapi import FastAPI, File, UploadFile, Form, HTTPException
+from fastapi import FastAPI, File, UploadFile, Form, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import FileResponse
-from fastapi.staticfiles import StaticFiles
 import pandas as pd
 import openai
-import pdfplumber
 from fpdf import FPDF
 import tempfile
 import os
 import uuid
 import io
+from contextlib import asynccontextmanager
 from typing import Optional, List
+import anyio
+from static_assets import PrecompressedStaticFiles, ReactIndex, precompress_static
+from pdf_extraction import extract_pdf_text
+from profiling import PROFILE_ID_HEADER, ProfileMiddleware, save_profile_inputs
 
-app = FastAPI(title="AI Business Analysis API", version="1.0.0")
+@asynccontextmanager
+async def lifespan(app):
+    # Build-time precompression makes this a no-op; otherwise each worker fills
+    # in missing variants once at startup (atomic writes, so workers can race)
+    if os.path.exists("build"):
+        await anyio.to_thread.run_sync(precompress_static, "build/static")
+    yield
+
+app = FastAPI(title="AI Business Analysis API", version="1.0.0", lifespan=lifespan)
 
 # Enable CORS
 app.add_middleware(
@@ -22,11 +33,15 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[PROFILE_ID_HEADER],
 )
 
 # Store temporary files
 TEMP_DIR = tempfile.gettempdir()
 
+# Admin-only profiling; a no-op unless PROFILE_ADMIN_TOKEN is set and presented
+app.add_middleware(ProfileMiddleware, base_dir=TEMP_DIR)
+
 def process_company_questions(entry, api_key):
     """Generate personalized questions for a company"""
     # Set the API key directly
@@ -102,13 +117,8 @@ def extract_qa_from_multiple_pdfs(pdf_files):
             with open(temp_pdf_path, 'wb') as f:
                 f.write(pdf_content)
             
-            # Extract text from this PDF
-            pdf_text = ""
-            with pdfplumber.open(temp_pdf_path) as pdf:
-                for page in pdf.pages:
-                    text = page.extract_text()
-                    if text:
-                        pdf_text += text + "\n"
+            # Extract text from this PDF (fast engine, pdfplumber for poor pages)
+            pdf_text = extract_pdf_text(temp_pdf_path)
             
             if pdf_text.strip():
                 combined_qa_text += f"\n=== DOCUMENT {i+1}: {pdf_file.filename} ===\n"
@@ -416,6 +426,113 @@ def process_inline_formatting(pdf, text, indent=False):
         pdf.ln(6)
 
 
+def run_questions_pipeline(company_entry, api_key):
+    """Generate the diagnostic questionnaire and its PDF for one company"""
+    result = process_company_questions(company_entry, api_key)
+
+    # Create PDF
+    questions_text = f"QUESTIONNAIRE DIAGNOSTIC - {result['business_name']}\n\n"
+    questions_text += "\n".join([f"{i+1}. {q}" for i, q in enumerate(result['questions'])])
+
+    pdf = create_pdf(questions_text, f"Questionnaire Diagnostic - {result['business_name']}")
+
+    # Save PDF temporarily
+    pdf_id = str(uuid.uuid4())
+    pdf_path = os.path.join(TEMP_DIR, f"{pdf_id}.pdf")
+    pdf.output(pdf_path)
+
+    return {
+        "success": True,
+        "business_name": result['business_name'],
+        "questions_count": len(result['questions']),
+        "questions_preview": result['questions'][:5],
+        "pdf_id": pdf_id
+    }
+
+def run_swot_pipeline(form_data, pdf_files, business_name, api_key):
+    """Extract the Q&A documents, generate the SWOT analysis and its PDF"""
+    # Extract content from all PDF files
+    detailed_qa, processed_files = extract_qa_from_multiple_pdfs(pdf_files)
+
+    # Generate SWOT analysis
+    swot_analysis = generate_swot_analysis(form_data, detailed_qa, api_key)
+
+    # Create PDF with analysis info
+    analysis_header = f"ANALYSE SWOT - {business_name}\n\n"
+    analysis_header += f"Documents analysés: {', '.join(processed_files)}\n"
+    analysis_header += f"Nombre de documents PDF traités: {len(processed_files)}\n\n"
+    analysis_header += "=" * 50 + "\n\n"
+
+    full_content = analysis_header + swot_analysis
+
+    pdf = create_pdf(full_content, f"Analyse SWOT - {business_name}")
+
+    # Save PDF temporarily
+    pdf_id = str(uuid.uuid4())
+    pdf_path = os.path.join(TEMP_DIR, f"{pdf_id}.pdf")
+    pdf.output(pdf_path)
+
+    return {
+        "success": True,
+        "business_name": business_name,
+        "swot_analysis": swot_analysis,
+        "processed_files": processed_files,
+        "files_count": len(processed_files),
+        "pdf_id": pdf_id
+    }
+
+def run_action_plan_pipeline(form_data, pdf_files, business_name, swot_analysis, api_key):
+    """Generate the action plan and both the action-plan and comprehensive PDFs"""
+    # Extract content from all PDF files
+    detailed_qa, processed_files = extract_qa_from_multiple_pdfs(pdf_files)
+
+    # Generate action plan
+    action_plan = generate_action_plan(form_data, detailed_qa, swot_analysis, api_key)
+
+    action_plan_header = f"PLAN D'ACTION - {business_name}\n\n"
+    action_plan_header += f"Documents analysés: {', '.join(processed_files)}\n"
+    action_plan_header += f"Nombre de documents PDF traités: {len(processed_files)}\n\n"
+    action_plan_header += "=" * 50 + "\n\n"
+
+    action_plan_content = action_plan_header + action_plan
+    action_pdf = create_pdf(action_plan_content, f"Plan d'action - {business_name}")
+
+    # Save Action Plan PDF
+    action_pdf_id = str(uuid.uuid4())
+    action_pdf_path = os.path.join(TEMP_DIR, f"{action_pdf_id}.pdf")
+    action_pdf.output(action_pdf_path)
+
+    # Create comprehensive PDF with SWOT + Action Plan
+    comprehensive_header = f"ANALYSE STRATEGIQUE COMPLETE - {business_name}\n\n"
+    comprehensive_header += f"Documents analysés: {', '.join(processed_files)}\n"
+    comprehensive_header += f"Nombre de documents PDF traités: {len(processed_files)}\n\n"
+    comprehensive_header += "=" * 60 + "\n"
+    comprehensive_header += "PARTIE 1: ANALYSE SWOT\n"
+    comprehensive_header += "=" * 60 + "\n\n"
+
+    comprehensive_content = comprehensive_header + swot_analysis + "\n\n"
+    comprehensive_content += "=" * 60 + "\n"
+    comprehensive_content += "PARTIE 2: PLAN D'ACTION STRATEGIQUE\n"
+    comprehensive_content += "=" * 60 + "\n\n"
+    comprehensive_content += action_plan
+
+    comprehensive_pdf = create_pdf(comprehensive_content, f"Strategie Complete - {business_name}")
+
+    # Save comprehensive PDF
+    comprehensive_pdf_id = str(uuid.uuid4())
+    comprehensive_pdf_path = os.path.join(TEMP_DIR, f"{comprehensive_pdf_id}.pdf")
+    comprehensive_pdf.output(comprehensive_pdf_path)
+
+    return {
+        "success": True,
+        "business_name": business_name,
+        "action_plan": action_plan,
+        "processed_files": processed_files,
+        "files_count": len(processed_files),
+        "action_pdf_id": action_pdf_id,  # SWOT-only PDF ID
+        "comprehensive_pdf_id": comprehensive_pdf_id  # Combined PDF ID
+    }
+
 # API Routes
 @app.get("/")
 async def root():
@@ -439,6 +556,7 @@ async def health():
 
 @app.post("/api/generate-questions")
 async def generate_questions_endpoint(
+    request: Request,
     csv_file: UploadFile = File(...),
     business_name: str = Form(...),
     api_key: str = Form(...)
@@ -475,26 +593,8 @@ async def generate_questions_endpoint(
         
         # Process company
         company_entry = matches.iloc[0].to_dict()
-        result = process_company_questions(company_entry, api_key)
-        
-        # Create PDF
-        questions_text = f"QUESTIONNAIRE DIAGNOSTIC - {result['business_name']}\n\n"
-        questions_text += "\n".join([f"{i+1}. {q}" for i, q in enumerate(result['questions'])])
-        
-        pdf = create_pdf(questions_text, f"Questionnaire Diagnostic - {result['business_name']}")
-        
-        # Save PDF temporarily
-        pdf_id = str(uuid.uuid4())
-        pdf_path = os.path.join(TEMP_DIR, f"{pdf_id}.pdf")
-        pdf.output(pdf_path)
-        
-        return {
-            "success": True,
-            "business_name": result['business_name'],
-            "questions_count": len(result['questions']),
-            "questions_preview": result['questions'][:5],
-            "pdf_id": pdf_id
-        }
+        save_profile_inputs(request, TEMP_DIR, "generate-questions", business_name, company_entry)
+        return run_questions_pipeline(company_entry, api_key)
         
     except HTTPException:
         raise
@@ -503,6 +603,7 @@ async def generate_questions_endpoint(
 
 @app.post("/api/generate-swot")
 async def generate_swot_endpoint(
+    request: Request,
     csv_file: UploadFile = File(...),
     pdf_files: List[UploadFile] = File(...),
     business_name: str = Form(...),
@@ -546,36 +647,9 @@ async def generate_swot_endpoint(
                 }
             )
         
-        # Extract content from all PDF files
-        detailed_qa, processed_files = extract_qa_from_multiple_pdfs(pdf_files)
-        
-        # Generate SWOT analysis
         form_data = matches.iloc[0].to_dict()
-        swot_analysis = generate_swot_analysis(form_data, detailed_qa, api_key)
-        
-        # Create PDF with analysis info
-        analysis_header = f"ANALYSE SWOT - {business_name}\n\n"
-        analysis_header += f"Documents analysés: {', '.join(processed_files)}\n"
-        analysis_header += f"Nombre de documents PDF traités: {len(processed_files)}\n\n"
-        analysis_header += "=" * 50 + "\n\n"
-        
-        full_content = analysis_header + swot_analysis
-        
-        pdf = create_pdf(full_content, f"Analyse SWOT - {business_name}")
-        
-        # Save PDF temporarily
-        pdf_id = str(uuid.uuid4())
-        pdf_path = os.path.join(TEMP_DIR, f"{pdf_id}.pdf")
-        pdf.output(pdf_path)
-        
-        return {
-            "success": True,
-            "business_name": business_name,
-            "swot_analysis": swot_analysis,
-            "processed_files": processed_files,
-            "files_count": len(processed_files),
-            "pdf_id": pdf_id
-        }
+        save_profile_inputs(request, TEMP_DIR, "generate-swot", business_name, form_data, pdf_files)
+        return run_swot_pipeline(form_data, pdf_files, business_name, api_key)
         
     except HTTPException:
         raise
@@ -584,6 +658,7 @@ async def generate_swot_endpoint(
 
 @app.post("/api/generate-action-plan")
 async def generate_action_plan_endpoint(
+    request: Request,
     csv_file: UploadFile = File(...),
     pdf_files: List[UploadFile] = File(...),
     business_name: str = Form(...),
@@ -628,56 +703,12 @@ async def generate_action_plan_endpoint(
                 }
             )
         
-        # Extract content from all PDF files
-        detailed_qa, processed_files = extract_qa_from_multiple_pdfs(pdf_files)
-        
-        # Generate action plan
         form_data = matches.iloc[0].to_dict()
-        action_plan = generate_action_plan(form_data, detailed_qa, swot_analysis, api_key)
-        
-        action_plan_header = f"PLAN D'ACTION - {business_name}\n\n"
-        action_plan_header += f"Documents analysés: {', '.join(processed_files)}\n"
-        action_plan_header += f"Nombre de documents PDF traités: {len(processed_files)}\n\n"
-        action_plan_header += "=" * 50 + "\n\n"
-
-        action_plan_content = action_plan_header + action_plan
-        action_pdf = create_pdf(action_plan_content, f"Plan d'action - {business_name}")
-
-        # Save Action Plan PDF
-        action_pdf_id = str(uuid.uuid4())
-        action_pdf_path = os.path.join(TEMP_DIR, f"{action_pdf_id}.pdf")
-        action_pdf.output(action_pdf_path)
-        
-        # Create comprehensive PDF with SWOT + Action Plan
-        comprehensive_header = f"ANALYSE STRATEGIQUE COMPLETE - {business_name}\n\n"
-        comprehensive_header += f"Documents analysés: {', '.join(processed_files)}\n"
-        comprehensive_header += f"Nombre de documents PDF traités: {len(processed_files)}\n\n"
-        comprehensive_header += "=" * 60 + "\n"
-        comprehensive_header += "PARTIE 1: ANALYSE SWOT\n"
-        comprehensive_header += "=" * 60 + "\n\n"
-        
-        comprehensive_content = comprehensive_header + swot_analysis + "\n\n"
-        comprehensive_content += "=" * 60 + "\n"
-        comprehensive_content += "PARTIE 2: PLAN D'ACTION STRATEGIQUE\n"
-        comprehensive_content += "=" * 60 + "\n\n"
-        comprehensive_content += action_plan
-        
-        comprehensive_pdf = create_pdf(comprehensive_content, f"Strategie Complete - {business_name}")
-        
-        # Save comprehensive PDF
-        comprehensive_pdf_id = str(uuid.uuid4())
-        comprehensive_pdf_path = os.path.join(TEMP_DIR, f"{comprehensive_pdf_id}.pdf")
-        comprehensive_pdf.output(comprehensive_pdf_path)
-        
-        return {
-            "success": True,
-            "business_name": business_name,
-            "action_plan": action_plan,
-            "processed_files": processed_files,
-            "files_count": len(processed_files),
-            "action_pdf_id": action_pdf_id,  # SWOT-only PDF ID
-            "comprehensive_pdf_id": comprehensive_pdf_id  # Combined PDF ID
-        }
+        save_profile_inputs(
+            request, TEMP_DIR, "generate-action-plan", business_name, form_data, pdf_files,
+            swot_analysis=swot_analysis
+        )
+        return run_action_plan_pipeline(form_data, pdf_files, business_name, swot_analysis, api_key)
         
     except HTTPException:
         raise
@@ -701,18 +732,20 @@ async def download_pdf(pdf_id: str):
 # Serve React app (add this after you build React)
 # Mount static files
 if os.path.exists("build"):
-    app.mount("/static", StaticFiles(directory="build/static"), name="static")
+    # Compressed variants (see lifespan) are served by Accept-Encoding
+    app.mount("/static", PrecompressedStaticFiles(directory="build/static"), name="static")
+    react_index = ReactIndex("build/index.html")
     
     @app.get("/")
-    async def serve_react_app():
-        return FileResponse("build/index.html")
+    async def serve_react_app(request: Request):
+        return react_index.response(request)
     
     @app.get("/{full_path:path}")
-    async def serve_react_routes(full_path: str):
+    async def serve_react_routes(full_path: str, request: Request):
         # Handle React Router routes
         if full_path.startswith("api"):
             raise HTTPException(status_code=404, detail="API route not found")
-        return FileResponse("build/index.html")
+        return react_index.response(request)
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,154 @@
+# pdf_extraction.py - Pluggable PDF text extraction with per-page fallback
+import functools
+import os
+import unicodedata
+
+import pdfplumber
+
+try:
+    import pypdfium2 as pdfium
+except ImportError:  # without pdfium every page goes through pdfplumber
+    pdfium = None
+
+# A page whose fast extraction looks like this is re-extracted with pdfplumber
+MIN_PAGE_CHARS = 20
+MIN_ALNUM_RATIO = 0.5
+MAX_GARBLED_RATIO = 0.02
+
+
+class PdfplumberDocument:
+    """Reference engine: full character layout, slow but robust"""
+    name = "pdfplumber"
+
+    def __init__(self, path):
+        self.pdf = pdfplumber.open(path)
+
+    def __len__(self):
+        return len(self.pdf.pages)
+
+    def page_text(self, index):
+        page = self.pdf.pages[index]
+        text = page.extract_text() or ""
+        # Drop the parsed layout objects so long documents don't accumulate them
+        page.flush_cache()
+        return text
+
+    def close(self):
+        self.pdf.close()
+
+
+class PdfiumDocument:
+    """Fast engine: PDFium's native text extraction, no layout analysis"""
+    name = "pdfium"
+
+    def __init__(self, path):
+        self.pdf = pdfium.PdfDocument(path)
+
+    def __len__(self):
+        return len(self.pdf)
+
+    def page_text(self, index):
+        page = self.pdf[index]
+        textpage = page.get_textpage()
+        try:
+            text = textpage.get_text_range()
+        finally:
+            textpage.close()
+            page.close()
+        return normalize_text(text)
+
+    def close(self):
+        self.pdf.close()
+
+
+# Only engines whose library imported are available
+ENGINES = {PdfplumberDocument.name: PdfplumberDocument}
+if pdfium is not None:
+    ENGINES[PdfiumDocument.name] = PdfiumDocument
+
+
+@functools.lru_cache(maxsize=None)
+def default_engine():
+    """Engine named by PDF_EXTRACTION_ENGINE, pdfium when it is installed"""
+    name = os.environ.get("PDF_EXTRACTION_ENGINE")
+    if name in ENGINES:
+        return name
+    if name:
+        # Resolved once per process, so this is only logged once
+        print(f"PDF extraction engine '{name}' is not available, using {PdfplumberDocument.name}")
+        return PdfplumberDocument.name
+    return PdfiumDocument.name if PdfiumDocument.name in ENGINES else PdfplumberDocument.name
+
+
+def normalize_text(text):
+    """Match pdfplumber's layout: \\n line breaks, no trailing spaces"""
+    text = text.replace("\r\n", "\n").replace("\r", "\n").replace("\x0c", "\n")
+    return "\n".join(line.rstrip() for line in text.split("\n")).strip("\n")
+
+
+def is_garbled_char(char):
+    """Replacement, control, private-use and unassigned characters"""
+    return char == "\ufffd" or unicodedata.category(char) in ("Cc", "Co", "Cn", "Cs")
+
+
+def text_quality_ok(text):
+    """Cheap check that extracted text is dense and readable enough to trust"""
+    chars = [c for c in text if not c.isspace()]
+    if len(chars) < MIN_PAGE_CHARS:
+        return False
+    alnum = sum(1 for c in chars if c.isalnum())
+    if alnum / len(chars) < MIN_ALNUM_RATIO:
+        return False
+    garbled = sum(1 for c in chars if is_garbled_char(c))
+    return garbled / len(chars) <= MAX_GARBLED_RATIO
+
+
+def extract_page_texts(path, engine=None, fallback=True):
+    """Extract text page by page, falling back to pdfplumber for poor pages.
+
+    Pages the fast engine can't read, or whose text fails the quality check, are
+    re-extracted with pdfplumber; so is the whole document if the engine can't
+    open it. Returns the page texts and the number of pages that fell back.
+    """
+    engine = engine or default_engine()
+    fallback = fallback and engine != PdfplumberDocument.name
+    reference = None
+    fallbacks = 0
+    texts = []
+
+    try:
+        document = ENGINES[engine](path)
+    except Exception as e:
+        if not fallback:
+            raise
+        print(f"{engine} could not open {path}, using pdfplumber: {str(e)}")
+        document = reference = PdfplumberDocument(path)
+        fallback = False
+        fallbacks = len(document)
+
+    try:
+        for index in range(len(document)):
+            try:
+                text = document.page_text(index)
+            except Exception as e:
+                if not fallback:
+                    raise
+                print(f"{engine} failed on page {index + 1} of {path}: {str(e)}")
+                text = None
+            if fallback and (text is None or not text_quality_ok(text)):
+                if reference is None:
+                    reference = PdfplumberDocument(path)
+                text = reference.page_text(index)
+                fallbacks += 1
+            texts.append(text)
+    finally:
+        document.close()
+        if reference is not None and reference is not document:
+            reference.close()
+    return texts, fallbacks
+
+
+def extract_pdf_text(path, engine=None):
+    """Extract a PDF's text in the format the analysis prompts expect"""
+    texts, _ = extract_page_texts(path, engine)
+    return "".join(text + "\n" for text in texts if text)
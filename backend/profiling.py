@@ -0,0 +1,132 @@
+# profiling.py - Opt-in, admin-only request profiling
+from starlette.datastructures import Headers, QueryParams
+import pandas as pd
+import hmac
+import json
+import os
+import uuid
+
+try:
+    from pyinstrument import Profiler
+    from pyinstrument.renderers import SpeedscopeRenderer
+except ImportError:  # profiling is unavailable without pyinstrument
+    Profiler = None
+
+# Send the admin token in this header (or ?profile=<token>) to profile a request
+PROFILE_HEADER = "X-Profile-Token"
+PROFILE_QUERY_PARAM = "profile"
+PROFILE_ID_HEADER = "X-Profile-Id"
+PROFILE_INTERVAL = 0.001
+
+
+def profile_paths(profile_id, base_dir):
+    """Locations of a stored profile and the inputs needed to replay it"""
+    return {
+        "speedscope": os.path.join(base_dir, f"{profile_id}.speedscope.json"),
+        "html": os.path.join(base_dir, f"{profile_id}.profile.html"),
+        "inputs": os.path.join(base_dir, f"{profile_id}_inputs"),
+    }
+
+
+def profiling_requested(scope):
+    """True only when an admin token is configured and the request presents it"""
+    admin_token = os.environ.get("PROFILE_ADMIN_TOKEN")
+    if not admin_token or Profiler is None:
+        return False
+    token = Headers(scope=scope).get(PROFILE_HEADER)
+    if not token:
+        token = QueryParams(scope["query_string"]).get(PROFILE_QUERY_PARAM)
+    # Bytes, since compare_digest rejects non-ASCII str
+    return bool(token) and hmac.compare_digest(token.encode(), admin_token.encode())
+
+
+def write_profile(profiler, profile_id, base_dir):
+    """Save the profile as speedscope JSON and a pyinstrument flamegraph page"""
+    paths = profile_paths(profile_id, base_dir)
+    with open(paths["speedscope"], 'w') as f:
+        f.write(profiler.output(renderer=SpeedscopeRenderer()))
+    with open(paths["html"], 'w') as f:
+        f.write(profiler.output_html())
+    return paths
+
+
+class ProfileMiddleware:
+    """ASGI middleware that runs flagged requests under a sampling profiler.
+
+    Unflagged requests are passed straight through to the app.
+    """
+
+    def __init__(self, app, base_dir):
+        self.app = app
+        self.base_dir = base_dir
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not profiling_requested(scope):
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = str(uuid.uuid4())
+        # Exposed to endpoints as request.state.profile_id
+        scope.setdefault("state", {})["profile_id"] = profile_id
+
+        async def send_with_profile_id(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((PROFILE_ID_HEADER.lower().encode("latin-1"), profile_id.encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        profiler = Profiler(interval=PROFILE_INTERVAL, async_mode="enabled")
+        profiler.start()
+        try:
+            await self.app(scope, receive, send_with_profile_id)
+        finally:
+            profiler.stop()
+            try:
+                write_profile(profiler, profile_id, self.base_dir)
+            except Exception as e:
+                print(f"Error writing profile {profile_id}: {str(e)}")
+
+
+def save_profile_inputs(request, base_dir, endpoint, business_name, form_data, pdf_files=None, **fields):
+    """Store a profiled request's CSV row and documents so it can be replayed offline.
+
+    Diagnostics only: failures are logged and never fail the customer's request.
+    """
+    profile_id = getattr(request.state, "profile_id", None)
+    if profile_id is None:
+        return None
+
+    inputs_dir = profile_paths(profile_id, base_dir)["inputs"]
+    try:
+        write_profile_inputs(inputs_dir, endpoint, business_name, form_data, pdf_files, fields)
+    except Exception as e:
+        print(f"Error saving inputs for profile {profile_id}: {str(e)}")
+        return None
+    return inputs_dir
+
+
+def write_profile_inputs(inputs_dir, endpoint, business_name, form_data, pdf_files, fields):
+    """Write inputs.json and the uploaded PDFs into inputs_dir"""
+    os.makedirs(inputs_dir, exist_ok=True)
+
+    documents = []
+    for i, pdf_file in enumerate(pdf_files or []):
+        stored_name = f"document_{i}.pdf"
+        try:
+            with open(os.path.join(inputs_dir, stored_name), 'wb') as f:
+                f.write(pdf_file.file.read())
+        finally:
+            pdf_file.file.seek(0)
+        documents.append({"filename": pdf_file.filename, "path": stored_name})
+
+    manifest = {
+        "endpoint": endpoint,
+        "business_name": business_name,
+        # NaN/NA are not valid JSON; the pipeline skips missing values anyway
+        "form_data": {k: (None if pd.isna(v) else v) for k, v in form_data.items()},
+        "documents": documents,
+        **fields,
+    }
+    with open(os.path.join(inputs_dir, "inputs.json"), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2, default=str)
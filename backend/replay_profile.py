@@ -0,0 +1,102 @@
+# replay_profile.py - Replay a profiled request offline with a mocked LLM
+#
+# Usage (from backend/):
+#   python replay_profile.py <profile_id> [--inputs-dir DIR] [--output-dir DIR]
+import argparse
+import io
+import json
+import os
+import time
+import uuid
+from types import SimpleNamespace
+from unittest import mock
+
+from pyinstrument import Profiler
+
+import main
+from profiling import PROFILE_INTERVAL, profile_paths, write_profile
+
+# Stand-in completions shaped like real model output, so PDF formatting is exercised
+MOCK_SECTION = """### {title}
+- **Point clé {n}** : l'entreprise s'appuie sur une *expertise reconnue* et une relation client de proximité.
+- **Levier {n}**: structurer les processus internes pour soutenir la croissance.
+1. Déployer un outil de pilotage commercial
+2. Optimiser la sélection des opportunités et **maximiser** le taux de conversion
+Échéance : T4 2025 | Responsable : À remplir par le client | Priorité : 1
+"""
+MOCK_ANALYSIS = "## ANALYSE\n\n" + "\n".join(
+    MOCK_SECTION.format(title=title, n=n)
+    for n, title in enumerate(["ATOUTS", "FAIBLESSES", "OPPORTUNITÉS", "MENACES"] * 4, 1)
+)
+MOCK_QUESTIONS = "\n".join(
+    f"{n}. Quel est l'impact de votre stratégie commerciale sur la fidélisation de vos clients clés ?"
+    for n in range(1, 91)
+)
+
+
+def mock_chat_completion(endpoint, latency):
+    """Replacement for openai.ChatCompletion.create returning canned content"""
+    content = MOCK_QUESTIONS if endpoint == "generate-questions" else MOCK_ANALYSIS
+
+    def create(**kwargs):
+        if latency:
+            time.sleep(latency)
+        return {"choices": [{"message": {"content": content}}]}
+
+    return create
+
+
+def load_documents(inputs_dir, documents):
+    """Rebuild upload-like objects for the stored PDFs"""
+    uploads = []
+    for doc in documents:
+        with open(os.path.join(inputs_dir, doc["path"]), 'rb') as f:
+            uploads.append(SimpleNamespace(filename=doc["filename"], file=io.BytesIO(f.read())))
+    return uploads
+
+
+def run_pipeline(inputs, pdf_files):
+    """Run the endpoint's own pipeline function on the stored inputs"""
+    endpoint = inputs["endpoint"]
+    if endpoint == "generate-questions":
+        return main.run_questions_pipeline(inputs["form_data"], "replay")
+    if endpoint == "generate-swot":
+        return main.run_swot_pipeline(inputs["form_data"], pdf_files, inputs["business_name"], "replay")
+    return main.run_action_plan_pipeline(
+        inputs["form_data"], pdf_files, inputs["business_name"], inputs["swot_analysis"], "replay"
+    )
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Replay a stored request under the profiler")
+    parser.add_argument("profile_id", help="ID returned in the X-Profile-Id header")
+    parser.add_argument("--inputs-dir", help="Directory holding inputs.json (defaults to the stored inputs)")
+    parser.add_argument("--output-dir", default=main.TEMP_DIR, help="Where to write the profile")
+    parser.add_argument("--llm-latency", type=float, default=0.0,
+                        help="Seconds the mocked LLM call should sleep")
+    args = parser.parse_args()
+
+    inputs_dir = args.inputs_dir or profile_paths(args.profile_id, main.TEMP_DIR)["inputs"]
+    with open(os.path.join(inputs_dir, "inputs.json"), encoding='utf-8') as f:
+        inputs = json.load(f)
+    pdf_files = load_documents(inputs_dir, inputs["documents"])
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    replay_id = f"replay_{args.profile_id}_{uuid.uuid4().hex[:8]}"
+    profiler = Profiler(interval=PROFILE_INTERVAL)
+    with mock.patch.object(main.openai.ChatCompletion, "create",
+                           mock_chat_completion(inputs["endpoint"], args.llm_latency)):
+        profiler.start()
+        try:
+            run_pipeline(inputs, pdf_files)
+        finally:
+            profiler.stop()
+
+    paths = write_profile(profiler, replay_id, args.output_dir)
+    print(profiler.output_text(unicode=True, color=False))
+    print(f"Speedscope profile: {paths['speedscope']}")
+    print(f"Flamegraph: {paths['html']}")
+
+
+if __name__ == "__main__":
+    main_cli()
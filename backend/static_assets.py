@@ -0,0 +1,189 @@
+# static_assets.py - Compressed, cache-friendly serving of the React build
+from fastapi import HTTPException, Request, Response
+from fastapi.staticfiles import StaticFiles
+import anyio
+import gzip
+import hashlib
+import mimetypes
+import os
+import re
+import sys
+import tempfile
+
+try:
+    import brotli
+except ImportError:  # brotli is optional, gzip is always available
+    brotli = None
+
+# Files worth compressing (images and fonts are already compressed)
+COMPRESSIBLE_EXTENSIONS = ('.js', '.css', '.map', '.txt', '.json', '.svg', '.html')
+MIN_COMPRESS_SIZE = 1024
+
+# CRA emits content-hashed names like main.bc618383.js
+HASHED_FILENAME = re.compile(r'\.[0-9a-f]{8,}\.')
+IMMUTABLE_CACHE = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE = "no-cache"
+
+# Preferred order when the client accepts several encodings
+ENCODING_SUFFIXES = [("br", ".br"), ("gzip", ".gz")]
+VARIANT_SUFFIXES = tuple(suffix for _, suffix in ENCODING_SUFFIXES)
+
+
+def compress_bytes(data, encoding):
+    """Compress data with the given content-coding"""
+    if encoding == "br":
+        return brotli.compress(data, quality=11)
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+
+def available_encodings():
+    """Content-codings this server can produce"""
+    return [(enc, suffix) for enc, suffix in ENCODING_SUFFIXES if enc != "br" or brotli is not None]
+
+
+def accepted_encodings(header):
+    """Parse an Accept-Encoding header into the set of acceptable codings"""
+    accepted = set()
+    for item in (header or "").split(","):
+        coding, _, params = item.strip().partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = params.strip()
+        if q.startswith("q="):
+            try:
+                if float(q[2:]) == 0:
+                    continue
+            except ValueError:
+                continue
+        accepted.add(coding)
+    return accepted
+
+
+def preferred_encodings(header, encodings):
+    """Encodings the client accepts from the ones we have, best first"""
+    accepted = accepted_encodings(header)
+    return [(enc, suffix) for enc, suffix in encodings if enc in accepted or "*" in accepted]
+
+
+def write_atomic(target, data):
+    """Write via a temp file and rename, so readers never see a partial file"""
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(target), prefix=".tmp-")
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(temp_path, target)
+    except BaseException:
+        os.remove(temp_path)
+        raise
+
+
+def precompress_static(static_dir):
+    """Write .gz/.br siblings for compressible files in the build directory.
+
+    Existing variants are only rebuilt when older than their source. Writes are
+    atomic, so concurrent workers can run this safely. A read-only filesystem is
+    not an error: those files are simply served uncompressed.
+    """
+    written = 0
+    for root, _, files in os.walk(static_dir):
+        for name in files:
+            if not name.endswith(COMPRESSIBLE_EXTENSIONS):
+                continue
+            source = os.path.join(root, name)
+            try:
+                if os.path.getsize(source) < MIN_COMPRESS_SIZE:
+                    continue
+                source_mtime = os.path.getmtime(source)
+                data = None
+                for enc, suffix in available_encodings():
+                    target = source + suffix
+                    if os.path.exists(target) and os.path.getmtime(target) >= source_mtime:
+                        continue
+                    if data is None:
+                        with open(source, 'rb') as f:
+                            data = f.read()
+                    write_atomic(target, compress_bytes(data, enc))
+                    written += 1
+            except OSError as e:
+                print(f"Could not precompress {source}: {str(e)}")
+    return written
+
+
+def cache_control_for(path):
+    """Hashed bundles never change; everything else must be revalidated"""
+    if HASHED_FILENAME.search(os.path.basename(path)):
+        return IMMUTABLE_CACHE
+    return REVALIDATE_CACHE
+
+
+class PrecompressedStaticFiles(StaticFiles):
+    """StaticFiles that serves precompressed variants and sets cache headers"""
+
+    async def get_response(self, path, scope):
+        # Variants are only served through negotiation, never by their own name
+        if path.endswith(VARIANT_SUFFIXES):
+            raise HTTPException(status_code=404)
+
+        # A variant may be missing (e.g. no brotli when precompressing), so try each
+        response = None
+        encodings = []
+        if path.endswith(COMPRESSIBLE_EXTENSIONS):
+            encodings = preferred_encodings(Request(scope).headers.get("accept-encoding"), available_encodings())
+        for enc, suffix in encodings:
+            full_path, stat_result = await anyio.to_thread.run_sync(self.lookup_path, path + suffix)
+            if stat_result is not None and os.path.isfile(full_path):
+                response = self.file_response(full_path, stat_result, scope)
+                response.headers["content-encoding"] = enc
+                media_type = mimetypes.guess_type(path)[0]
+                if media_type:
+                    response.headers["content-type"] = media_type
+                break
+
+        if response is None:
+            response = await super().get_response(path, scope)
+
+        if response.status_code in (200, 304):
+            response.headers["cache-control"] = cache_control_for(path)
+            if path.endswith(COMPRESSIBLE_EXTENSIONS):
+                response.headers["vary"] = "Accept-Encoding"
+        return response
+
+
+class ReactIndex:
+    """index.html held in memory with its compressed variants and ETag"""
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self.content = f.read()
+        digest = hashlib.sha1(self.content).hexdigest()
+        self.variants = {None: self.content}
+        self.etags = {None: f'"{digest}"'}
+        # Each content-coding is its own representation, so it gets its own ETag
+        for enc, _ in available_encodings():
+            self.variants[enc] = compress_bytes(self.content, enc)
+            self.etags[enc] = f'"{digest}-{enc}"'
+
+    def response(self, request):
+        preferred = preferred_encodings(request.headers.get("accept-encoding"), available_encodings())
+        enc = preferred[0][0] if preferred else None
+        headers = {
+            "ETag": self.etags[enc],
+            "Cache-Control": REVALIDATE_CACHE,
+            "Vary": "Accept-Encoding",
+        }
+
+        # Only the negotiated representation's ETag validates a cached copy
+        if_none_match = request.headers.get("if-none-match", "")
+        client_etags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        if "*" in client_etags or self.etags[enc] in client_etags:
+            return Response(status_code=304, headers=headers)
+
+        if enc is not None:
+            headers["Content-Encoding"] = enc
+        return Response(self.variants[enc], media_type="text/html", headers=headers)
+
+
+if __name__ == "__main__":
+    # Precompress at build time: python static_assets.py build/static
+    print(f"Wrote {precompress_static(sys.argv[1] if len(sys.argv) > 1 else 'build/static')} compressed variants")